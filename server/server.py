@@ -1,39 +1,84 @@
 #!/usr/bin/env python3
-import sys, json, traceback
-from typing import Dict, Any, Optional
-from xss_analyzer import analyze
+import sys, io, re, json, traceback, hashlib, threading, asyncio, concurrent.futures
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+from xss_analyzer import IncrementalAnalysis
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json fallback
+    orjson = None
 
 
 # ---------- LSP stdio helpers ----------
-def read_message() -> Optional[Dict[str, Any]]:
-    headers = {}
-    line = sys.stdin.buffer.readline()
-    if not line:
+# Large buffer so a whole frame (headers + body) usually arrives in one read.
+STDIN_BUFFER_SIZE = 65536
+
+
+def open_stdin() -> io.BufferedReader:
+    return io.BufferedReader(sys.stdin.buffer.raw, buffer_size=STDIN_BUFFER_SIZE)
+
+
+def _content_length(header_block: bytes) -> int:
+    for line in header_block.split(b"\r\n"):
+        key, _, value = line.partition(b":")
+        if key.strip().lower() == b"content-length":
+            return int(value.strip() or b"0")
+    return 0
+
+
+def read_message(stream: io.BufferedReader) -> Optional[Dict[str, Any]]:
+    chunk = stream.peek(4096)
+    if not chunk:
         return None
 
-    while line and line.strip():
-        key, _, value = line.decode("utf-8", "replace").partition(":")
-        headers[key.strip().lower()] = value.strip()
-        line = sys.stdin.buffer.readline()
+    end = chunk.find(b"\r\n\r\n")
+    # a bare \n before the match means \n-separated headers and a \r\n\r\n
+    # that belongs to the body; leave those to the line loop
+    if end != -1 and b"\n" not in chunk[:end].replace(b"\r\n", b""):
+        content_length = _content_length(chunk[:end])
+        stream.read(end + 4)
+    else:
+        # header block not fully buffered yet (or bare \n separators)
+        headers = {}
+        line = stream.readline()
+        while line and line.strip():
+            key, _, value = line.decode("utf-8", "replace").partition(":")
+            headers[key.strip().lower()] = value.strip()
+            line = stream.readline()
+        content_length = int(headers.get("content-length", "0"))
 
-    content_length = int(headers.get("content-length", "0"))
     if content_length <= 0:
         return None
 
-    body = sys.stdin.buffer.read(content_length)
+    body = stream.read(content_length)
+    if orjson is not None:
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            pass  # e.g. invalid UTF-8: retry below with replacement decoding
     try:
         return json.loads(body.decode("utf-8", "replace"))
     except Exception:
         return None
 
 
-def send_message(payload: Dict[str, Any]) -> None:
-    data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
-    sys.stdout.buffer.write(f"Content-Length: {len(data)}\r\n\r\n".encode("ascii"))
-    sys.stdout.buffer.write(data)
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)  # already compact UTF-8 bytes
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def send_frame(data: bytes) -> None:
+    # only ever called on the event loop thread, so frames cannot interleave
+    sys.stdout.buffer.write(b"Content-Length: %d\r\n\r\n" % len(data) + data)
     sys.stdout.buffer.flush()
 
 
+def send_message(payload: Dict[str, Any]) -> None:
+    send_frame(dumps(payload))
+
+
 def reply(req: Dict[str, Any], result: Any = None, error: Any = None) -> None:
     resp = {"jsonrpc": "2.0", "id": req.get("id")}
     if error is not None:
@@ -43,51 +88,153 @@ def reply(req: Dict[str, Any], result: Any = None, error: Any = None) -> None:
     send_message(resp)
 
 
-def notify(method: str, params: Any) -> None:
-    send_message({"jsonrpc": "2.0", "method": method, "params": params})
-
-
 # ---------- state ----------
 docs: Dict[str, str] = {}  # uri -> text
+analyses: Dict[str, IncrementalAnalysis] = {}  # uri -> per-document incremental analyzer
+
+# text digest -> serialized diagnostics array; undo/redo and no-op edits hit this
+DIAG_CACHE_SIZE = 32
+_diag_cache: "OrderedDict[bytes, bytes]" = OrderedDict()
+_cache_lock = threading.Lock()  # compute_diagnostics runs on executor threads
+
+# didChange is debounced per uri: only the latest text after a typing pause is analyzed
+DEBOUNCE_SECONDS = 0.15
+_timers: Dict[str, asyncio.TimerHandle] = {}  # uri -> pending publish
+
+# bounded so a flood of edits applies backpressure to the stdin reader
+QUEUE_SIZE = 8
+
+
+# publishDiagnostics has a fixed shape, so it is written out directly instead of
+# building nested dicts for the generic encoder.
+_DIAG_TEMPLATE = (
+    b'{"range":{"start":{"line":%d,"character":%d},"end":{"line":%d,"character":%d}},'
+    b'"severity":%d,"source":"xss-lsp","message":%s}'
+)
+_PUBLISH_PREFIX = b'{"jsonrpc":"2.0","method":"textDocument/publishDiagnostics","params":{"uri":'
+
 
+def compute_diagnostics(analysis: IncrementalAnalysis, text: str) -> bytes:
+    """Returns the JSON "diagnostics" array for text."""
+    key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    with _cache_lock:
+        cached = _diag_cache.get(key)
+        if cached is not None:
+            _diag_cache.move_to_end(key)
+            return cached
 
-def publish_xss_diagnostics(uri: str, text: str) -> None:
-    diags = []
-    for issue in analyze(text):
-        diags.append({
-            "range": {
-                "start": {"line": issue.line, "character": issue.col},
-                "end": {"line": issue.line, "character": issue.end_col},
-            },
-            "severity": issue.severity,  # 1=Error, 2=Warning
-            "source": "xss-lsp",
-            "message": issue.message,
-        })
+    diags = b"[" + b",".join(
+        _DIAG_TEMPLATE % (
+            issue.line, issue.col, issue.line, issue.end_col,
+            issue.severity,  # 1=Error, 2=Warning
+            dumps(issue.message),
+        )
+        for issue in analysis.analyze(text)
+    ) + b"]"
+
+    with _cache_lock:
+        _diag_cache[key] = diags
+        if len(_diag_cache) > DIAG_CACHE_SIZE:
+            _diag_cache.popitem(last=False)
+    return diags
+
+
+async def publish_xss_diagnostics(uri: str) -> None:
+    text = docs.get(uri)
+    if text is None:
+        return
+    analysis = analyses.setdefault(uri, IncrementalAnalysis())
+    loop = asyncio.get_running_loop()
+    try:
+        diags = await loop.run_in_executor(None, compute_diagnostics, analysis, text)
+    except Exception:
+        traceback.print_exc(file=sys.stderr)
+        return
+    if docs.get(uri) is not text:
+        return  # edited while analyzing; the newer text has its own publish
+    send_frame(_PUBLISH_PREFIX + dumps(uri) + b',"diagnostics":' + diags + b"}}")
 
-    notify("textDocument/publishDiagnostics", {"uri": uri, "diagnostics": diags})
+
+def start_diagnostics(uri: str) -> None:
+    cancel_diagnostics(uri)
+    asyncio.get_running_loop().create_task(publish_xss_diagnostics(uri))
+
+
+def schedule_diagnostics(uri: str) -> None:
+    cancel_diagnostics(uri)
+    _timers[uri] = asyncio.get_running_loop().call_later(DEBOUNCE_SECONDS, _flush_diagnostics, uri)
+
+
+def cancel_diagnostics(uri: Optional[str] = None) -> None:
+    uris = [uri] if uri is not None else list(_timers)
+    for key in uris:
+        handle = _timers.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+
+
+def _flush_diagnostics(uri: str) -> None:
+    _timers.pop(uri, None)
+    asyncio.get_running_loop().create_task(publish_xss_diagnostics(uri))
+
+
+# ---------- text sync ----------
+_LINE_BREAK_RE = re.compile(r"\r\n|\r|\n")
+
+
+def _line_starts(text: str) -> List[int]:
+    return [0] + [m.end() for m in _LINE_BREAK_RE.finditer(text)]
+
+
+def _offset_at(text: str, line_starts: List[int], position: Dict[str, int]) -> int:
+    line = position.get("line", 0)
+    if line >= len(line_starts):
+        return len(text)
+    start = line_starts[line]
+    end = line_starts[line + 1] if line + 1 < len(line_starts) else len(text)
+    content = text[start:end].rstrip("\r\n")
+    character = position.get("character", 0)  # UTF-16 code units
+    if content.isascii():
+        return start + min(character, len(content))
+    units = 0
+    for i, ch in enumerate(content):
+        if units >= character:
+            return start + i
+        units += 2 if ord(ch) > 0xFFFF else 1
+    return start + len(content)
+
+
+def apply_change(text: str, change: Dict[str, Any]) -> str:
+    rng = change.get("range")
+    if rng is None:
+        return change.get("text", "")  # full replacement
+    starts = _line_starts(text)
+    begin = _offset_at(text, starts, rng["start"])
+    end = _offset_at(text, starts, rng["end"])
+    return text[:begin] + change.get("text", "") + text[end:]
 
 
 # ---------- handlers ----------
 def on_initialize(req: Dict[str, Any]) -> None:
-    # Full sync: didChange가 "전체 텍스트"를 보냄
+    # Incremental sync: didChange가 변경된 범위만 보냄 (apply_change로 docs에 반영)
     result = {
         "capabilities": {
-            "textDocumentSync": 1,  # Full
+            "textDocumentSync": 2,  # Incremental
         }
     }
     reply(req, result)
 
 
 def on_shutdown(req: Dict[str, Any]) -> None:
+    cancel_diagnostics()
     reply(req, None)
 
 
 def on_did_open(params: Dict[str, Any]) -> None:
     td = params["textDocument"]
     uri = td["uri"]
-    text = td.get("text", "")
-    docs[uri] = text
-    publish_xss_diagnostics(uri, text)
+    docs[uri] = td.get("text", "")
+    start_diagnostics(uri)
 
 
 def on_did_change(params: Dict[str, Any]) -> None:
@@ -95,14 +242,42 @@ def on_did_change(params: Dict[str, Any]) -> None:
     changes = params.get("contentChanges", [])
     if not changes:
         return
-    text = changes[-1].get("text", "")
+    text = docs.get(uri, "")
+    for change in changes:
+        text = apply_change(text, change)
     docs[uri] = text
-    publish_xss_diagnostics(uri, text)
+    schedule_diagnostics(uri)
 
 
-def main() -> None:
+# ---------- main loop ----------
+def _read_stdin(
+    stream: io.BufferedReader,
+    loop: asyncio.AbstractEventLoop,
+    queue: "asyncio.Queue[Optional[Dict[str, Any]]]",
+) -> None:
+    # Blocking reads stay on a daemon thread (portable across pipe types and
+    # platforms); the event loop keeps dispatching and publishing meanwhile.
+    while True:
+        try:
+            msg = read_message(stream)
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+            msg = None  # malformed frame: shut the loop down instead of stranding it
+        try:
+            asyncio.run_coroutine_threadsafe(queue.put(msg), loop).result()
+        except (RuntimeError, concurrent.futures.CancelledError):
+            return  # event loop closed or shutting down after "exit"
+        if msg is None:
+            return
+
+
+async def serve(stream: io.BufferedReader) -> None:
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue(maxsize=QUEUE_SIZE)
+    threading.Thread(target=_read_stdin, args=(stream, loop, queue), name="lsp-stdin", daemon=True).start()
+
     while True:
-        msg = read_message()
+        msg = await queue.get()
         if msg is None:
             break
 
@@ -130,5 +305,9 @@ def main() -> None:
             traceback.print_exc(file=sys.stderr)
 
 
+def main() -> None:
+    asyncio.run(serve(open_stdin()))
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
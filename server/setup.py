@@ -0,0 +1,13 @@
+# Optional: compile xss_analyzer.py to a C extension for faster analysis.
+#
+#   cd server && python setup.py build_ext --inplace
+#
+# The resulting xss_analyzer.*.so is picked up by server.py ahead of the .py
+# source; without it the server runs the pure-Python module unchanged.
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name="xss-lsp-analyzer",
+    ext_modules=cythonize(["xss_analyzer.py"], language_level=3),
+)
@@ -0,0 +1,91 @@
+import random
+import unittest
+
+from server import apply_change
+
+# LSP line breaks only; str.splitlines() would also split on \v, \f, \x85, \u2028, ...
+_BREAKS = ("\r\n", "\r", "\n")
+
+
+def _ref_lines(text):
+    """[(start, content)] per LSP line, scanning characters directly."""
+    lines, start, i = [], 0, 0
+    while i < len(text):
+        if text.startswith("\r\n", i):
+            lines.append((start, text[start:i]))
+            i += 2
+            start = i
+        elif text[i] in "\r\n":
+            lines.append((start, text[start:i]))
+            i += 1
+            start = i
+        else:
+            i += 1
+    lines.append((start, text[start:]))
+    return lines
+
+
+def _ref_offset(text, position):
+    # Works in UTF-16 space: take the requested code units of the line (clamped),
+    # rounding a split surrogate pair up to the whole character.
+    lines = _ref_lines(text)
+    if position["line"] >= len(lines):
+        return len(text)
+    start, content = lines[position["line"]]
+    units = content.encode("utf-16-le")
+    prefix = units[: 2 * position["character"]]
+    if prefix and 0xD800 <= int.from_bytes(prefix[-2:], "little") <= 0xDBFF:
+        prefix = units[: len(prefix) + 2]
+    return start + len(prefix.decode("utf-16-le"))
+
+
+def _ref_apply(text, change):
+    rng = change.get("range")
+    if rng is None:
+        return change["text"]
+    begin = _ref_offset(text, rng["start"])
+    end = _ref_offset(text, rng["end"])
+    return text[:begin] + change["text"] + text[end:]
+
+
+ALPHABET = ["a", "b", " ", "<", "é", "한", "😀", "𝐫"] + list(_BREAKS)
+
+
+def _random_text(rng, n):
+    return "".join(rng.choice(ALPHABET) for _ in range(n))
+
+
+def _random_position(rng, text):
+    lines = _ref_lines(text)
+    line = rng.randrange(len(lines) + 1)  # occasionally past the last line
+    width = len(lines[line][1].encode("utf-16-le")) // 2 if line < len(lines) else 0
+    return {"line": line, "character": rng.randrange(width + 3)}  # occasionally past the end
+
+
+class ApplyChangeTest(unittest.TestCase):
+    def test_full_replacement(self):
+        self.assertEqual(apply_change("old", {"text": "new"}), "new")
+
+    def test_crlf_lone_cr_and_astral(self):
+        text = "a\r\nb😀c\rd\ne"
+        change = {"range": {"start": {"line": 1, "character": 1}, "end": {"line": 1, "character": 3}}, "text": "X"}
+        self.assertEqual(apply_change(text, change), "a\r\nbXc\rd\ne")
+        change = {"range": {"start": {"line": 2, "character": 0}, "end": {"line": 3, "character": 1}}, "text": ""}
+        self.assertEqual(apply_change(text, change), "a\r\nb😀c\r")
+
+    def test_random_edits_match_utf16_reference(self):
+        rng = random.Random(7)
+        text = _random_text(rng, 40)
+        for step in range(3000):
+            start = _random_position(rng, text)
+            end = _random_position(rng, text)
+            if (end["line"], end["character"]) < (start["line"], start["character"]):
+                start, end = end, start
+            change = {"range": {"start": start, "end": end}, "text": _random_text(rng, rng.randrange(6))}
+            expected = _ref_apply(text, change)
+            self.assertEqual(apply_change(text, change), expected, f"step {step}: {change!r} on {text!r}")
+            text = expected if len(expected) < 400 else _random_text(rng, 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import ast
+import os
+import random
+import unittest
+
+from xss_analyzer import IncrementalAnalysis, analyze
+
+APP_PY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "testcase", "app.py")
+
+# lines spliced into the fixture: sources, sinks, sanitizers, decorators, broken syntax
+SNIPPETS = [
+    "",
+    "# comment",
+    "x = request.args['q']",
+    "v = 'safe'",
+    "y = x",
+    "x = 'clean'",
+    "Response(y)",
+    "make_response(x)",
+    "import html",
+    "@app.route('/extra')",
+    "def extra(a):",
+    "    return a",
+    "    return v",
+    "    v = html.escape(v)",
+    "    return Markup(v)",
+    "    return f'<b>{v}</b>'",
+    "def clean(s):",
+    "    return html.escape(s)",
+    "    try:",
+    "    except Exception:",
+    "if x:",
+    "def broken(",
+]
+
+
+def _parses(code):
+    try:
+        ast.parse(code)
+    except SyntaxError:
+        return False
+    return True
+
+
+def _key(issues):
+    return [(i.line, i.col, i.end_col, i.severity, i.message) for i in issues]
+
+
+class IncrementalAnalysisTest(unittest.TestCase):
+    def setUp(self):
+        with open(APP_PY, encoding="utf-8") as f:
+            self.source = f.read()
+
+    def assertSameAsAnalyze(self, inc, code, msg=None):
+        self.assertEqual(_key(inc.analyze(code)), _key(analyze(code)), msg)
+
+    def test_unchanged_text(self):
+        inc = IncrementalAnalysis()
+        self.assertSameAsAnalyze(inc, self.source)
+        self.assertSameAsAnalyze(inc, self.source)  # second run is served from the cache
+
+    def test_random_edits_match_analyze(self):
+        rng = random.Random(1)
+        for seed in range(4):
+            inc = IncrementalAnalysis()
+            lines = self.source.split("\n")
+            previous = list(lines)
+            for step in range(120):
+                op = rng.random()
+                i = rng.randrange(len(lines))
+                if op < 0.3:
+                    lines.insert(i, rng.choice(SNIPPETS))
+                elif op < 0.5 and len(lines) > 5:
+                    del lines[i]
+                elif op < 0.7:
+                    lines[i] += rng.choice([" ", "x", "(", "  # <b>"])
+                else:
+                    j = rng.randrange(len(lines))
+                    lines[i], lines[j] = lines[j], lines[i]
+                code = "\n".join(lines)
+                self.assertSameAsAnalyze(inc, code, f"seed {seed}, step {step}")
+                if _parses(code):
+                    previous = list(lines)
+                else:
+                    lines = list(previous)  # keep editing the last parseable text
+
+    def test_entry_state_change_invalidates_later_statements(self):
+        # the sink statement's text is unchanged, only the taint flowing into it differs
+        inc = IncrementalAnalysis()
+        sink = "\n\nResponse(y)\n"
+        tainted = self.source + "\nx = request.args['q']\ny = x" + sink
+        self.assertSameAsAnalyze(inc, tainted)
+        clean = self.source + "\nx = 'clean'\ny = x" + sink
+        self.assertSameAsAnalyze(inc, clean)
+        self.assertSameAsAnalyze(inc, tainted)
+
+    def test_sanitizer_added_above_cached_statements(self):
+        # a new user sanitizer changes how every later statement is analyzed
+        inc = IncrementalAnalysis()
+        code = self.source + "\n\n@app.route('/z')\ndef z():\n    return clean(request.args['q'])\n"
+        self.assertSameAsAnalyze(inc, code)
+        code = "import html\n\n\ndef clean(s):\n    return html.escape(s)\n\n\n" + code
+        self.assertSameAsAnalyze(inc, code)
+
+    def test_recovers_after_syntax_error(self):
+        inc = IncrementalAnalysis()
+        self.assertSameAsAnalyze(inc, self.source)
+        self.assertEqual(inc.analyze(self.source + "\ndef broken(\n"), [])
+        self.assertSameAsAnalyze(inc, self.source.replace("# CASE 2\n", "# CASE 2\nv = 1\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,9 @@
+# Optional Cython declarations for xss_analyzer.py (pure-Python mode).
+# Build with: python setup.py build_ext --inplace
+
+cdef class TaintResult:
+    cdef public bint tainted
+    cdef public bint sanitized
+    cdef public object sources
+
+cpdef TaintResult _merge(object results)
@@ -1,10 +1,16 @@
 import ast
+import re
+import sys
+import threading
 from dataclasses import dataclass
-from typing import DefaultDict, Iterable, List, Optional, Set, Tuple
+from typing import AbstractSet, Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
 
 
 @dataclass
 class Issue:
+    # explicit __slots__ rather than dataclass(slots=True), which needs 3.10+
+    __slots__ = ("line", "col", "end_col", "message", "severity")
+
     line: int      # 0-based
     col: int       # 0-based
     end_col: int   # 0-based
@@ -12,30 +18,46 @@ class Issue:
     severity: int  # 1=Error, 2=Warning
 
 
-@dataclass
+# shared "no sources" value; TaintResult.sources is never mutated in place
+_EMPTY: FrozenSet[str] = frozenset()
+
+
 class TaintResult:
-    tainted: bool = False
-    sanitized: bool = False
-    sources: Set[str] = None
+    # created for every expression visited, so keep instances small
+    __slots__ = ("tainted", "sanitized", "sources")
 
-    def __post_init__(self) -> None:
-        if self.sources is None:
-            self.sources = set()
+    def __init__(
+        self,
+        tainted: bool = False,
+        sanitized: bool = False,
+        sources: Optional[AbstractSet[str]] = None,
+    ) -> None:
+        self.tainted = tainted
+        self.sanitized = sanitized
+        self.sources: AbstractSet[str] = sources or _EMPTY
 
+    def __repr__(self) -> str:
+        return f"TaintResult(tainted={self.tainted}, sanitized={self.sanitized}, sources={set(self.sources)})"
 
-KNOWN_SANITIZERS = {
+
+# Shared results for the source-less cases; callers must treat results as read-only.
+_CLEAN = TaintResult()
+_SANITIZED = TaintResult(sanitized=True)
+
+
+KNOWN_SANITIZERS = frozenset({
     "html.escape",
     "markupsafe.escape",
     "bleach.clean",
     "django.utils.html.escape",
     "django.utils.html.format_html",
     "flask.escape",
-}
+})
 
 # int(...) is treated as a sanitizer per requirements
-CAST_CLEAN_FUNCS = {"int"}
+CAST_CLEAN_FUNCS = frozenset({"int"})
 
-SINK_CALLS = {
+SINK_CALLS = frozenset({
     "render_template",
     "render_template_string",
     "flask.render_template",
@@ -62,9 +84,12 @@ SINK_CALLS = {
     "PlainTextResponse",
     "fastapi.responses.PlainTextResponse",
     "execute",
-}
+})
 
-SAFE_JSON_RESPONSES = {
+# Any call whose lowercased name ends like this is treated as a response/render sink.
+RESPONSE_SINK_SUFFIXES = ("response", "render")
+
+SAFE_JSON_RESPONSES = frozenset({
     "jsonify",
     "flask.jsonify",
     "JSONResponse",
@@ -73,28 +98,119 @@ SAFE_JSON_RESPONSES = {
     "fastapi.responses.ORJSONResponse",
     "UJSONResponse",
     "fastapi.responses.UJSONResponse",
-}
+})
+
+# Calls whose result is HTML even without markup literals (HTML context for returns).
+HTML_PRODUCING_CALLS = frozenset({
+    "Markup",
+    "markupsafe.Markup",
+    "HTMLResponse",
+    "fastapi.responses.HTMLResponse",
+    "render_template_string",
+})
+
+# Decorator names (lowercased) ending in one of these mark a request handler,
+# e.g. app.route, router.get, api_view.
+ENDPOINT_DECORATOR_SUFFIXES = ("route", "get", "post", "put", "delete", "patch", "options", "api_view")
+
+# Prefixes of dotted call/attribute names that read request input (case-insensitive).
+REQUEST_SOURCE_CALLS = (
+    "request.args",
+    "request.form",
+    "request.values",
+    "request.get_json",
+    "request.json",
+    "request.data",
+    "request.get_data",
+    "request.body",
+    "request.stream",
+    "request.headers",
+    "request.cookies",
+    "request.cookies.get",
+    "request.cookies.__getitem__",
+    "request.GET",
+    "request.POST",
+    "request.COOKIES",
+    "request.META",
+    "request.query_params",
+    "request.path_params",
+)
+
+REQUEST_SOURCE_ATTRS = (
+    "request.args",
+    "request.form",
+    "request.values",
+    "request.json",
+    "request.data",
+    "request.body",
+    "request.headers",
+    "request.cookies",
+    "request.get",
+    "request.get_data",
+    "request.meta",
+    "request.query_params",
+    "request.path_params",
+    "request.GET",
+    "request.POST",
+    "request.COOKIES",
+    "request.META",
+)
+
+# One anchored alternation per predicate (used with .match). The trailing branch
+# covers nested request objects, e.g. self.request.GET / view.request.get_json();
+# calls on those additionally need one of the input accessor names.
+# Matched against parsed identifiers, which are NFKC-normalized, so ASCII case
+# folding suffices and skips the Unicode case tables.
+_SOURCE_CALL_RE = re.compile(
+    "|".join(map(re.escape, REQUEST_SOURCE_CALLS))
+    + r"|(?=.*\.request\.).*?(?:args|form|values|get_json|json|headers|cookies|meta|get)",
+    re.IGNORECASE | re.ASCII,
+)
+_SOURCE_ATTR_RE = re.compile(
+    "|".join(map(re.escape, REQUEST_SOURCE_ATTRS)) + r"|.*?\.request\.",
+    re.IGNORECASE | re.ASCII,
+)
+
+# Taint only enters through request objects, input(), or endpoint decorator
+# arguments; ASCII source without any of these text fragments cannot produce an
+# issue. Only valid for ASCII text: identifiers are NFKC-normalized by the parser,
+# so e.g. "ｒequest" or "𝐫equest" still parse as request.
+_TAINT_HINT_RE = re.compile(r"request|input|@", re.IGNORECASE | re.ASCII)
 
 
 def analyze(code: str) -> List[Issue]:
+    if code.isascii() and not _TAINT_HINT_RE.search(code):
+        return []
     try:
         tree = ast.parse(code)
     except SyntaxError:
         return []
 
-    user_sanitizers = _discover_user_sanitizers(tree)
-    analyzer = TaintAnalyzer(code, user_sanitizers, tree)
+    analyzer = _new_analyzer(code, tree)
     analyzer.visit(tree)
     return analyzer.issues
 
 
-def _discover_user_sanitizers(tree: ast.AST) -> Set[str]:
+def _new_analyzer(code: str, tree: ast.AST) -> "TaintAnalyzer":
+    # no function definitions means nothing to pre-scan; skip that AST pass
+    if "def" in code:
+        user_sanitizers, function_defs = _prescan_functions(tree)
+    else:
+        user_sanitizers, function_defs = set(), set()
+    return TaintAnalyzer(code, user_sanitizers, function_defs)
+
+
+def _prescan_functions(tree: ast.AST) -> Tuple[Set[str], Set[str]]:
     """
-    Detect user-defined sanitizers by looking for functions that return a known sanitizer
-    or cast-clean output. This lets us treat sanitize(...) as safe only when it actually
-    escapes or normalizes input.
+    Single pass over the tree returning (user_sanitizers, function_names).
+
+    User-defined sanitizers are functions that return a known sanitizer or cast-clean
+    output. This lets us treat sanitize(...) as safe only when it actually escapes or
+    normalizes input. Only module- and class-level functions are considered sanitizers;
+    nested functions are still collected as names.
     """
     sanitizers: Set[str] = set()
+    names: Set[str] = set()
 
     def is_sanitizing_expr(expr: ast.AST) -> bool:
         if isinstance(expr, ast.Call):
@@ -105,18 +221,26 @@ def _discover_user_sanitizers(tree: ast.AST) -> Set[str]:
             return True
         return False
 
-    class Finder(ast.NodeVisitor):
+    class PreScan(ast.NodeVisitor):
+        def __init__(self) -> None:
+            self.depth = 0  # enclosing function count
+
         def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
-            for stmt in node.body:
-                if isinstance(stmt, ast.Return) and is_sanitizing_expr(stmt.value):
-                    sanitizers.add(node.name)
-                    break
+            names.add(node.name)
+            if self.depth == 0:
+                for stmt in node.body:
+                    if isinstance(stmt, ast.Return) and is_sanitizing_expr(stmt.value):
+                        sanitizers.add(node.name)
+                        break
+            self.depth += 1
+            self.generic_visit(node)
+            self.depth -= 1
 
         def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
             self.visit_FunctionDef(node)  # type: ignore[arg-type]
 
-    Finder().visit(tree)
-    return sanitizers
+    PreScan().visit(tree)
+    return sanitizers, names
 
 
 def _call_name(func: ast.AST) -> str:
@@ -134,15 +258,19 @@ def _call_name(func: ast.AST) -> str:
         if isinstance(cur, ast.Name):
             parts.append(cur.id)
         parts.reverse()
-        return ".".join(parts)
+        return sys.intern(".".join(parts))
     return ""
 
 
 def _literal_key(node: ast.AST) -> Optional[str]:
-    if isinstance(node, ast.Constant) and isinstance(node.value, (str, int)):
-        return str(node.value)
-    if isinstance(node, ast.Str):
-        return node.s
+    # ast.parse only emits Constant for literals (3.8+); the deprecated ast.Str
+    # alias would just add a Python-level isinstance hook per subscript
+    if type(node) is ast.Constant:
+        value = node.value
+        if type(value) is str:
+            return value
+        if isinstance(value, int):
+            return str(value)
     return None
 
 
@@ -153,41 +281,85 @@ def _merge(results: Iterable[TaintResult]) -> TaintResult:
     for res in results:
         if res.tainted:
             tainted = True
-            tainted_sources |= res.sources
+            if res.sources is not _EMPTY:
+                tainted_sources |= res.sources
         sanitized = sanitized or res.sanitized
-    if tainted:
-        sanitized = False
-    return TaintResult(tainted=tainted, sanitized=sanitized, sources=tainted_sources)
-
+    if not tainted:
+        return _SANITIZED if sanitized else _CLEAN
+    return TaintResult(tainted=True, sources=tainted_sources)
 
-def _collect_function_defs(tree: ast.AST) -> Set[str]:
-    names: Set[str] = set()
 
-    class Collector(ast.NodeVisitor):
-        def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
-            names.add(node.name)
-            self.generic_visit(node)
-
-        def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
-            names.add(node.name)
-            self.generic_visit(node)
+# line breaks as counted by ast line numbers
+_NEWLINE_RE = re.compile(r"\r\n|\r|\n")
+# every name in HTML_PRODUCING_CALLS contains its last dotted component
+_HTML_CALL_HINTS = tuple(sorted({name.rpartition(".")[2] for name in HTML_PRODUCING_CALLS}))
 
-    Collector().visit(tree)
-    return names
+# tainted, sanitized, tainted_keys, tainted_attrs
+_State = Tuple[Set[str], Set[str], Set[Tuple[str, str]], Set[Tuple[str, str]]]
+_FrozenState = Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[Tuple[str, str]], FrozenSet[Tuple[str, str]]]
 
 
 class TaintAnalyzer(ast.NodeVisitor):
-    def __init__(self, code: str, user_sanitizers: Set[str], tree: ast.AST) -> None:
+    def __init__(self, code: str, user_sanitizers: Set[str], function_defs: Set[str]) -> None:
         self.code = code
+        self._code_lines: Optional[List[str]] = None  # split lazily, only needed for reported returns
         self.issues: List[Issue] = []
         self.tainted: Set[str] = set()
         self.sanitized: Set[str] = set()
-        self.tainted_dict: DefaultDict[str, Set[str]] = DefaultDict(set)
-        self.attr_tainted: DefaultDict[str, Set[str]] = DefaultDict(set)
+        self.tainted_keys: Set[Tuple[str, str]] = set()   # (container, literal key), e.g. d["k"]
+        self.tainted_attrs: Set[Tuple[str, str]] = set()  # (base, attr), e.g. obj.attr
         self.sanitizer_funcs: Set[str] = set(KNOWN_SANITIZERS) | set(user_sanitizers)
-        self.function_defs: Set[str] = _collect_function_defs(tree)
+        self.function_defs: Set[str] = set(function_defs)
+        self._name_cache: Dict[int, str] = {}  # id(node) -> dotted name, per function scope
+        # exact node type -> handler; expr_taint runs for every expression node
+        self._expr_handlers: Dict[type, Callable[[Any], TaintResult]] = {
+            ast.Constant: self._expr_constant,
+            ast.Name: self._expr_name,
+            ast.Attribute: self._expr_attribute,
+            ast.Subscript: self._expr_subscript,
+            ast.Call: self._taint_from_call,
+            ast.JoinedStr: self._expr_joined_str,
+            ast.FormattedValue: self._expr_formatted_value,
+            ast.BinOp: self._expr_bin_op,
+            ast.BoolOp: self._expr_bool_op,
+            ast.Compare: self._expr_compare,
+            ast.IfExp: self._expr_if_exp,
+            ast.Dict: self._expr_dict,
+        }
+        # exact node type -> visitor, instead of NodeVisitor's getattr per statement
+        self._stmt_handlers: Dict[type, Callable[[Any], None]] = {
+            ast.Module: self.visit_Module,
+            ast.ClassDef: self.visit_ClassDef,
+            ast.FunctionDef: self.visit_FunctionDef,
+            ast.AsyncFunctionDef: self.visit_AsyncFunctionDef,
+            ast.Assign: self.visit_Assign,
+            ast.AnnAssign: self.visit_AnnAssign,
+            ast.AugAssign: self.visit_AugAssign,
+            ast.Return: self.visit_Return,
+            ast.Expr: self.visit_Expr,
+            ast.If: self.visit_If,
+            ast.Try: self.visit_Try,
+        }
 
     # ---------- visitors ----------
+    def visit(self, node: ast.AST) -> None:
+        handler = self._stmt_handlers.get(type(node))
+        if handler is None:
+            self.generic_visit(node)
+        else:
+            handler(node)
+
+    def generic_visit(self, node: ast.AST) -> None:
+        # Only statements have visitors and expressions never contain statements,
+        # so expression subtrees (loop iterables, with items, ...) are not descended.
+        for _, value in ast.iter_fields(node):
+            if isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ast.AST) and not isinstance(item, ast.expr):
+                        self.visit(item)
+            elif isinstance(value, ast.AST) and not isinstance(value, ast.expr):
+                self.visit(value)
+
     def visit_Module(self, node: ast.Module) -> None:
         for stmt in node.body:
             self.visit(stmt)
@@ -205,11 +377,12 @@ class TaintAnalyzer(ast.NodeVisitor):
     def _visit_function_like(self, node: ast.AST) -> None:
         saved_tainted = self.tainted
         saved_sanitized = self.sanitized
-        saved_dict = self.tainted_dict
+        saved_keys = self.tainted_keys
 
         self.tainted = set()
         self.sanitized = set()
-        self.tainted_dict = DefaultDict(set)
+        self.tainted_keys = set()
+        self._name_cache = {}
 
         if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
             if self._decorators_imply_endpoint(node.decorator_list):
@@ -222,7 +395,7 @@ class TaintAnalyzer(ast.NodeVisitor):
 
         self.tainted = saved_tainted
         self.sanitized = saved_sanitized
-        self.tainted_dict = saved_dict
+        self.tainted_keys = saved_keys
 
     def visit_Assign(self, node: ast.Assign) -> None:
         value_res = self.expr_taint(node.value)
@@ -234,7 +407,7 @@ class TaintAnalyzer(ast.NodeVisitor):
             self._assign_target(node.targets[0], value_res, node.value)
 
     def visit_AnnAssign(self, node: ast.AnnAssign) -> None:
-        value_res = self.expr_taint(node.value) if node.value is not None else TaintResult()
+        value_res = self.expr_taint(node.value) if node.value is not None else _CLEAN
         self._assign_target(node.target, value_res, node.value)
 
     def visit_AugAssign(self, node: ast.AugAssign) -> None:
@@ -246,7 +419,7 @@ class TaintAnalyzer(ast.NodeVisitor):
     def visit_Return(self, node: ast.Return) -> None:
         res = self.expr_taint(node.value)
         if res.tainted and not res.sanitized:
-            html_context = self._expression_contains_html(node.value)
+            html_context = self._source_may_contain_html(node) and self._expression_contains_html(node.value)
             label = "HTML" if html_context else "value"
             msg = f"Possible XSS: returning tainted {label}"
             if res.sources:
@@ -294,77 +467,63 @@ class TaintAnalyzer(ast.NodeVisitor):
             self.visit(stmt)
 
     # ---------- helpers ----------
-    def _snapshot_state(
-        self,
-    ) -> Tuple[
-        Set[str],
-        Set[str],
-        DefaultDict[str, Set[str]],
-        DefaultDict[str, Set[str]],
-    ]:
+    def _call_name(self, func: ast.AST) -> str:
+        """
+        Memoized module-level _call_name(). Attribute chains reuse the cached name of their base, so
+        resolving every prefix of a.b.c.d (as expr_taint does) stays linear.
+        """
+        key = id(func)
+        cached = self._name_cache.get(key)
+        if cached is not None:
+            return cached
+        if isinstance(func, ast.Name):
+            name = func.id
+        elif isinstance(func, ast.Attribute):
+            value = func.value
+            base = self._call_name(value) if isinstance(value, (ast.Name, ast.Attribute)) else ""
+            # identifiers from ast.parse are already interned; intern the joined chains
+            # too so set/dict lookups on them mostly short-circuit on identity
+            name = sys.intern(f"{base}.{func.attr}") if base else func.attr
+        else:
+            name = ""
+        self._name_cache[key] = name
+        return name
+
+    def _snapshot_state(self) -> _State:
         return (
             set(self.tainted),
             set(self.sanitized),
-            self._copy_defaultdict(self.tainted_dict),
-            self._copy_defaultdict(self.attr_tainted),
+            set(self.tainted_keys),
+            set(self.tainted_attrs),
         )
 
-    def _clone_state(
-        self,
-        state: Tuple[
-            Set[str],
-            Set[str],
-            DefaultDict[str, Set[str]],
-            DefaultDict[str, Set[str]],
-        ],
-    ) -> Tuple[
-        Set[str],
-        Set[str],
-        DefaultDict[str, Set[str]],
-        DefaultDict[str, Set[str]],
-    ]:
-        tainted, sanitized, tainted_dict, attr_tainted = state
+    def _clone_state(self, state: _State) -> _State:
+        tainted, sanitized, tainted_keys, tainted_attrs = state
         return (
             set(tainted),
             set(sanitized),
-            self._copy_defaultdict(tainted_dict),
-            self._copy_defaultdict(attr_tainted),
+            set(tainted_keys),
+            set(tainted_attrs),
         )
 
-    def _restore_state(
-        self,
-        state: Tuple[
-            Set[str],
-            Set[str],
-            DefaultDict[str, Set[str]],
-            DefaultDict[str, Set[str]],
-        ],
-    ) -> None:
-        self.tainted, self.sanitized, self.tainted_dict, self.attr_tainted = state
+    def _restore_state(self, state: _State) -> None:
+        self.tainted, self.sanitized, self.tainted_keys, self.tainted_attrs = state
 
-    def _merge_states(
-        self,
-        states: List[
-            Tuple[
-                Set[str],
-                Set[str],
-                DefaultDict[str, Set[str]],
-                DefaultDict[str, Set[str]],
-            ]
-        ],
-    ) -> Tuple[
-        Set[str],
-        Set[str],
-        DefaultDict[str, Set[str]],
-        DefaultDict[str, Set[str]],
-    ]:
+    def _frozen_state(self) -> _FrozenState:
+        return (
+            frozenset(self.tainted),
+            frozenset(self.sanitized),
+            frozenset(self.tainted_keys),
+            frozenset(self.tainted_attrs),
+        )
+
+    def _load_state(self, state: _FrozenState) -> None:
+        tainted, sanitized, tainted_keys, tainted_attrs = state
+        self._restore_state((set(tainted), set(sanitized), set(tainted_keys), set(tainted_attrs)))
+
+    def _merge_states(self, states: List[_State]) -> _State:
         if not states:
-            return (
-                set(),
-                set(),
-                DefaultDict(set),
-                DefaultDict(set),
-            )
+            return (set(), set(), set(), set())
 
         tainted_union: Set[str] = set()
         for state in states:
@@ -375,21 +534,13 @@ class TaintAnalyzer(ast.NodeVisitor):
             sanitized_intersection &= state[1]
         sanitized_intersection -= tainted_union
 
-        tainted_dict: DefaultDict[str, Set[str]] = DefaultDict(set)
-        attr_tainted: DefaultDict[str, Set[str]] = DefaultDict(set)
-        for _, _, tdict, adict in states:
-            for key, values in tdict.items():
-                tainted_dict[key].update(values)
-            for key, values in adict.items():
-                attr_tainted[key].update(values)
+        tainted_keys: Set[Tuple[str, str]] = set()
+        tainted_attrs: Set[Tuple[str, str]] = set()
+        for _, _, keys, attrs in states:
+            tainted_keys |= keys
+            tainted_attrs |= attrs
 
-        return tainted_union, sanitized_intersection, tainted_dict, attr_tainted
-
-    def _copy_defaultdict(self, source: DefaultDict[str, Set[str]]) -> DefaultDict[str, Set[str]]:
-        copied: DefaultDict[str, Set[str]] = DefaultDict(set)
-        for key, values in source.items():
-            copied[key] = set(values)
-        return copied
+        return tainted_union, sanitized_intersection, tainted_keys, tainted_attrs
 
     def _assign_target(self, target: ast.AST, value_res: TaintResult, value_node: Optional[ast.AST] = None) -> None:
         if isinstance(target, ast.Name):
@@ -414,32 +565,22 @@ class TaintAnalyzer(ast.NodeVisitor):
         elif isinstance(target, ast.Subscript):
             base_name = target.value.id if isinstance(target.value, ast.Name) else None
             key = _literal_key(getattr(target, "slice", None))
-            if value_res.tainted and base_name and key is not None:
-                self.tainted_dict[base_name].add(key)
-            elif base_name and key is not None:
-                if key in self.tainted_dict.get(base_name, set()):
-                    self.tainted_dict[base_name].discard(key)
-                    if not self.tainted_dict[base_name]:
-                        self.tainted_dict.pop(base_name, None)
+            if base_name and key is not None:
+                if value_res.tainted:
+                    self.tainted_keys.add((base_name, key))
+                else:
+                    self.tainted_keys.discard((base_name, key))
         elif isinstance(target, ast.Attribute):
             base_name = target.value.id if isinstance(target.value, ast.Name) else None
             attr = target.attr if isinstance(target, ast.Attribute) else None
             if base_name and attr:
                 if value_res.tainted:
-                    self.attr_tainted[base_name].add(attr)
-                elif value_res.sanitized:
-                    if attr in self.attr_tainted.get(base_name, set()):
-                        self.attr_tainted[base_name].discard(attr)
-                        if not self.attr_tainted[base_name]:
-                            self.attr_tainted.pop(base_name, None)
+                    self.tainted_attrs.add((base_name, attr))
                 else:
-                    if attr in self.attr_tainted.get(base_name, set()):
-                        self.attr_tainted[base_name].discard(attr)
-                        if not self.attr_tainted[base_name]:
-                            self.attr_tainted.pop(base_name, None)
+                    self.tainted_attrs.discard((base_name, attr))
         else:
             if value_res.tainted and isinstance(target, ast.Attribute):
-                name = _call_name(target)
+                name = self._call_name(target)
                 self._mark_tainted(name or "<attr>", value_res.sources)
 
     def _mark_tainted(self, name: str, sources: Set[str]) -> None:
@@ -456,117 +597,123 @@ class TaintAnalyzer(ast.NodeVisitor):
 
     def expr_taint(self, node: Optional[ast.AST]) -> TaintResult:
         if node is None:
-            return TaintResult()
-
-        if isinstance(node, ast.Constant):
-            return TaintResult()
-
-        if isinstance(node, ast.Name):
-            if node.id in self.tainted:
-                return TaintResult(tainted=True, sources={node.id})
-            if node.id in self.sanitized:
-                return TaintResult(sanitized=True)
-            return TaintResult()
-
-        if isinstance(node, ast.Attribute):
-            chain = _call_name(node)
-            if self._attribute_is_request_source(chain):
-                return TaintResult(tainted=True, sources={chain})
-            base_name = node.value.id if isinstance(node.value, ast.Name) else None
-            if base_name and node.attr in self.attr_tainted.get(base_name, set()):
-                return TaintResult(tainted=True, sources={f"{base_name}.{node.attr}"})
-            base_res = self.expr_taint(node.value)
-            if base_res.tainted:
-                return TaintResult(tainted=True, sources=base_res.sources or {chain})
-            if base_res.sanitized:
-                return TaintResult(sanitized=True)
-            return TaintResult()
-
-        if isinstance(node, ast.Subscript):
-            if self._subscript_is_request_source(node):
-                return TaintResult(tainted=True, sources={"request"})
-            base_res = self.expr_taint(node.value)
-            key = _literal_key(getattr(node, "slice", None))
-            base_name = node.value.id if isinstance(node.value, ast.Name) else None
-            tainted = False
-            sources: Set[str] = set()
-            if base_res.tainted:
+            return _CLEAN
+        handler = self._expr_handlers.get(type(node))
+        if handler is None:
+            return _CLEAN
+        return handler(node)
+
+    def _expr_constant(self, node: ast.Constant) -> TaintResult:
+        return _CLEAN
+
+    def _expr_name(self, node: ast.Name) -> TaintResult:
+        if node.id in self.tainted:
+            return TaintResult(tainted=True, sources={node.id})
+        if node.id in self.sanitized:
+            return _SANITIZED
+        return _CLEAN
+
+    def _expr_attribute(self, node: ast.Attribute) -> TaintResult:
+        chain = self._call_name(node)
+        if self._attribute_is_request_source(chain):
+            return TaintResult(tainted=True, sources={chain})
+        base_name = node.value.id if isinstance(node.value, ast.Name) else None
+        if base_name and (base_name, node.attr) in self.tainted_attrs:
+            return TaintResult(tainted=True, sources={f"{base_name}.{node.attr}"})
+        base_res = self.expr_taint(node.value)
+        if base_res.tainted:
+            return TaintResult(tainted=True, sources=base_res.sources or {chain})
+        if base_res.sanitized:
+            return _SANITIZED
+        return _CLEAN
+
+    def _expr_subscript(self, node: ast.Subscript) -> TaintResult:
+        if self._subscript_is_request_source(node):
+            return TaintResult(tainted=True, sources={"request"})
+        base_res = self.expr_taint(node.value)
+        key = _literal_key(getattr(node, "slice", None))
+        base_name = node.value.id if isinstance(node.value, ast.Name) else None
+        tainted = False
+        sources: Set[str] = set()
+        if base_res.tainted:
+            tainted = True
+            sources |= base_res.sources
+        elif base_name and key is not None:
+            if (base_name, key) in self.tainted_keys or (base_name, "*") in self.tainted_keys:
                 tainted = True
-                sources |= base_res.sources
-            elif base_name and key is not None:
-                if key in self.tainted_dict.get(base_name, set()) or "*" in self.tainted_dict.get(base_name, set()):
-                    tainted = True
-                    sources.add(f"{base_name}[{key}]")
-            sanitized = False
-            if not tainted and base_res.sanitized:
-                sanitized = True
-            return TaintResult(tainted=tainted, sanitized=sanitized, sources=sources)
-
-        if isinstance(node, ast.Call):
-            return self._taint_from_call(node)
-
-        if isinstance(node, ast.JoinedStr):
-            parts = [self.expr_taint(v) for v in node.values]
-            return _merge(parts)
-
-        if isinstance(node, ast.FormattedValue):
-            return self.expr_taint(node.value)
-
-        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Mod)):
-            left = self.expr_taint(node.left)
-            right = self.expr_taint(node.right)
-            return _merge([left, right])
-
-        if isinstance(node, ast.BoolOp):
-            return _merge(self.expr_taint(v) for v in node.values)
-
-        if isinstance(node, ast.Compare):
-            parts = [self.expr_taint(node.left)] + [self.expr_taint(c) for c in node.comparators]
-            return _merge(parts)
-
-        if isinstance(node, ast.IfExp):
-            body_res = self.expr_taint(node.body)
-            else_res = self.expr_taint(node.orelse)
-            tainted = body_res.tainted or else_res.tainted
-            sanitized = (body_res.sanitized and else_res.sanitized) and not tainted
-            sources = set()
-            if body_res.tainted:
-                sources |= body_res.sources
-            if else_res.tainted:
-                sources |= else_res.sources
-            return TaintResult(tainted=tainted, sanitized=sanitized, sources=sources)
-
-        if isinstance(node, ast.Dict):
-            vals = [self.expr_taint(v) for v in node.values]
-            return _merge(vals)
-
-        return TaintResult()
+                sources.add(f"{base_name}[{key}]")
+        sanitized = False
+        if not tainted and base_res.sanitized:
+            sanitized = True
+        return TaintResult(tainted=tainted, sanitized=sanitized, sources=sources)
+
+    def _expr_joined_str(self, node: ast.JoinedStr) -> TaintResult:
+        # literal parts are always clean; only the interpolated values can carry taint
+        parts = [self.expr_taint(v.value) for v in node.values if type(v) is ast.FormattedValue]
+        return _merge(parts)
+
+    def _expr_formatted_value(self, node: ast.FormattedValue) -> TaintResult:
+        return self.expr_taint(node.value)
+
+    def _expr_bin_op(self, node: ast.BinOp) -> TaintResult:
+        if not isinstance(node.op, (ast.Add, ast.Mod)):
+            return _CLEAN
+        left = self.expr_taint(node.left)
+        right = self.expr_taint(node.right)
+        return _merge([left, right])
+
+    def _expr_bool_op(self, node: ast.BoolOp) -> TaintResult:
+        return _merge(self.expr_taint(v) for v in node.values)
+
+    def _expr_compare(self, node: ast.Compare) -> TaintResult:
+        parts = [self.expr_taint(node.left)] + [self.expr_taint(c) for c in node.comparators]
+        return _merge(parts)
+
+    def _expr_if_exp(self, node: ast.IfExp) -> TaintResult:
+        body_res = self.expr_taint(node.body)
+        else_res = self.expr_taint(node.orelse)
+        tainted = body_res.tainted or else_res.tainted
+        sanitized = (body_res.sanitized and else_res.sanitized) and not tainted
+        sources = set()
+        if body_res.tainted:
+            sources |= body_res.sources
+        if else_res.tainted:
+            sources |= else_res.sources
+        return TaintResult(tainted=tainted, sanitized=sanitized, sources=sources)
+
+    def _expr_dict(self, node: ast.Dict) -> TaintResult:
+        vals = [self.expr_taint(v) for v in node.values]
+        return _merge(vals)
 
     def _taint_from_call(self, node: ast.Call) -> TaintResult:
-        name = _call_name(node.func)
+        name = self._call_name(node.func)
         arg_results = [self.expr_taint(a) for a in node.args] + [self.expr_taint(k.value) for k in node.keywords]
-        self._check_sink_call(node, name, arg_results)
+
+        # one pass over the arguments, shared by the sink check and the result below
+        any_tainted = False
+        tainted_sources: Set[str] = set()
+        for res in arg_results:
+            if res.tainted:
+                any_tainted = True
+                tainted_sources |= res.sources
+        if any_tainted:
+            self._check_sink_call(node, name, tainted_sources)
 
         if self._is_source_call(name):
             src = name or "external-input"
             return TaintResult(tainted=True, sources={src})
 
         if name in SAFE_JSON_RESPONSES:
-            return TaintResult(sanitized=True)
+            return _SANITIZED
 
         if name in self.sanitizer_funcs:
-            return TaintResult(sanitized=True)
+            return _SANITIZED
 
         if isinstance(node.func, ast.Name) and node.func.id in CAST_CLEAN_FUNCS:
-            tainted_args = any(r.tainted for r in arg_results)
-            if tainted_args:
-                return TaintResult(sanitized=True)
-            return TaintResult()
+            if any_tainted:
+                return _SANITIZED
+            return _CLEAN
 
-        tainted_sources: Set[str] = set()
-        for res in arg_results:
-            if res.tainted:
-                tainted_sources |= res.sources
         tainted = bool(tainted_sources)
         sanitized = not tainted and any(r.sanitized for r in arg_results)
 
@@ -582,89 +729,51 @@ class TaintAnalyzer(ast.NodeVisitor):
     def _is_source_call(self, name: str) -> bool:
         if name == "input":
             return True
-        lower = name.lower()
-        request_prefixes = [
-            "request.args",
-            "request.form",
-            "request.values",
-            "request.get_json",
-            "request.json",
-            "request.data",
-            "request.get_data",
-            "request.body",
-            "request.stream",
-            "request.headers",
-            "request.cookies",
-            "request.cookies.get",
-            "request.cookies.__getitem__",
-            "request.GET",
-            "request.POST",
-            "request.COOKIES",
-            "request.META",
-            "request.query_params",
-            "request.path_params",
-        ]
-        if any(lower.startswith(pref.lower()) for pref in request_prefixes):
-            return True
-        if ".request." in lower:
-            for suffix in ("args", "form", "values", "get_json", "json", "headers", "cookies", "meta", "get"):
-                if suffix in lower:
-                    return True
-        return False
+        return _SOURCE_CALL_RE.match(name) is not None
 
     def _attribute_is_request_source(self, chain: str) -> bool:
-        lower = chain.lower()
-        attr_hits = [
-            "request.args",
-            "request.form",
-            "request.values",
-            "request.json",
-            "request.data",
-            "request.body",
-            "request.headers",
-            "request.cookies",
-            "request.get",
-            "request.get_data",
-            "request.meta",
-            "request.query_params",
-            "request.path_params",
-            "request.GET",
-            "request.POST",
-            "request.COOKIES",
-            "request.META",
-        ]
-        if any(lower.startswith(a.lower()) for a in attr_hits):
-            return True
-        if ".request." in lower:
-            return True
-        return False
+        return _SOURCE_ATTR_RE.match(chain) is not None
 
     def _subscript_is_request_source(self, node: ast.Subscript) -> bool:
         if isinstance(node.value, ast.Attribute):
-            chain = _call_name(node.value)
+            chain = self._call_name(node.value)
             return self._attribute_is_request_source(chain)
         if isinstance(node.value, ast.Name) and node.value.id == "request":
             return True
         return False
 
-    def _check_sink_call(self, node: ast.Call, name: str, arg_results: List[TaintResult]) -> None:
-        tainted_args = [res for res in arg_results if res.tainted and not res.sanitized]
-        if not tainted_args:
-            return
-        lower_name = name.lower()
-        is_response_like = lower_name.endswith("response") or lower_name.endswith("render") or name in SINK_CALLS
+    def _check_sink_call(self, node: ast.Call, name: str, sources: AbstractSet[str]) -> None:
+        # called only when some argument is tainted (tainted results are never sanitized)
         if name in SAFE_JSON_RESPONSES:
             return
-        if not is_response_like and name not in SINK_CALLS:
+        if name not in SINK_CALLS and not name.lower().endswith(RESPONSE_SINK_SUFFIXES):
             return
-        sources: Set[str] = set()
-        for res in tainted_args:
-            sources |= res.sources
         msg = f"Possible XSS: tainted data flows into sink '{name or '<call>'}'"
         if sources:
             msg += f" (sources: {sorted(sources)})"
         self._add_issue(node, msg)
 
+    def _source_may_contain_html(self, node: ast.AST) -> bool:
+        """
+        Text pre-check for _expression_contains_html: False only when the node's source
+        lines are ASCII with no bracket pair and no HTML-producing call name, so the walk
+        can be skipped.
+        """
+        lineno = getattr(node, "lineno", None)
+        end_lineno = getattr(node, "end_lineno", None)
+        if lineno is None or end_lineno is None:
+            return True
+        if self._code_lines is None:
+            self._code_lines = _NEWLINE_RE.split(self.code)
+        segment = "".join(self._code_lines[lineno - 1:end_lineno])
+        if "\\" in segment:
+            return True  # escapes such as "\x3c" can spell brackets
+        if not segment.isascii():
+            return True  # identifiers are NFKC-normalized, e.g. "Ｍarkup" is Markup
+        if "<" in segment and ">" in segment:
+            return True
+        return any(hint in segment for hint in _HTML_CALL_HINTS)
+
     def _expression_contains_html(self, node: Optional[ast.AST]) -> bool:
         if node is None:
             return False
@@ -681,8 +790,8 @@ class TaintAnalyzer(ast.NodeVisitor):
         if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
             return self._expression_contains_html(node.left) or self._expression_contains_html(node.right)
         if isinstance(node, ast.Call):
-            name = _call_name(node.func)
-            if name in {"Markup", "markupsafe.Markup", "HTMLResponse", "fastapi.responses.HTMLResponse", "render_template_string"}:
+            name = self._call_name(node.func)
+            if name in HTML_PRODUCING_CALLS:
                 return True
             if isinstance(node.func, ast.Attribute) and node.func.attr in {"format", "format_map"}:
                 if isinstance(node.func.value, ast.Constant) and isinstance(node.func.value.value, str):
@@ -692,10 +801,8 @@ class TaintAnalyzer(ast.NodeVisitor):
 
     def _decorators_imply_endpoint(self, decorators: List[ast.expr]) -> bool:
         for dec in decorators:
-            name = _call_name(dec) if not isinstance(dec, ast.Call) else _call_name(dec.func)
-            lower = name.lower()
-            endpoint_markers = ("route", "get", "post", "put", "delete", "patch", "options", "api_view")
-            if any(lower.endswith(m) or lower.endswith(f".{m}") for m in endpoint_markers):
+            name = self._call_name(dec) if not isinstance(dec, ast.Call) else self._call_name(dec.func)
+            if name.lower().endswith(ENDPOINT_DECORATOR_SUFFIXES):
                 return True
         return False
 
@@ -710,9 +817,83 @@ class TaintAnalyzer(ast.NodeVisitor):
         ))
 
     def _span(self, node: ast.AST) -> Tuple[int, int, int]:
-        line = max(0, getattr(node, "lineno", 1) - 1)
-        col = max(0, getattr(node, "col_offset", 0))
-        end_col = getattr(node, "end_col_offset", col + 1)
+        # issues are only raised on Return/Call nodes from ast.parse, which always carry
+        # positions (lineno >= 1, col_offset >= 0)
+        col = node.col_offset
+        end_col = node.end_col_offset
         if end_col is None:
             end_col = col + 1
-        return line, col, end_col
\ No newline at end of file
+        return node.lineno - 1, col, end_col
+
+
+class IncrementalAnalysis:
+    """
+    analyze() for one document that is re-run on every edit.
+
+    Each top-level statement's result is keyed by its source lines, the taint state it
+    starts from and the file's sanitizer set. Those fully determine what visiting it
+    does, so statements matching an entry from the previous run reuse its issues
+    (shifted to the new line) and exit state instead of being visited again.
+    Results are identical to analyze(code).
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[Tuple[Any, ...], Tuple[List[Issue], _FrozenState]] = {}
+        self._lock = threading.Lock()  # callers may analyze from several threads
+
+    def analyze(self, code: str) -> List[Issue]:
+        with self._lock:
+            return self._analyze(code)
+
+    def _analyze(self, code: str) -> List[Issue]:
+        if code.isascii() and not _TAINT_HINT_RE.search(code):
+            self._entries = {}
+            return []
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            return []  # keep entries; the next parseable edit can still reuse them
+
+        analyzer = _new_analyzer(code, tree)
+        lines = _NEWLINE_RE.split(code)
+        sanitizers = frozenset(analyzer.sanitizer_funcs)
+        entries: Dict[Tuple[Any, ...], Tuple[List[Issue], _FrozenState]] = {}
+        issues: List[Issue] = []
+
+        for stmt in getattr(tree, "body", []):
+            start = _statement_start_line(stmt)
+            offset = start - 1
+            key = (
+                "\n".join(lines[offset:stmt.end_lineno]),
+                stmt.col_offset,
+                sanitizers,
+                analyzer._frozen_state(),
+            )
+            cached = entries.get(key) or self._entries.get(key)
+            if cached is not None:
+                relative, exit_state = cached
+                issues.extend(
+                    Issue(i.line + offset, i.col, i.end_col, i.message, i.severity) for i in relative
+                )
+                analyzer._load_state(exit_state)
+            else:
+                before = len(analyzer.issues)
+                analyzer.visit(stmt)
+                new_issues = analyzer.issues[before:]
+                issues.extend(new_issues)
+                relative = [
+                    Issue(i.line - offset, i.col, i.end_col, i.message, i.severity) for i in new_issues
+                ]
+                exit_state = analyzer._frozen_state()
+            entries[key] = (relative, exit_state)
+
+        self._entries = entries
+        return issues
+
+
+def _statement_start_line(stmt: ast.stmt) -> int:
+    # decorators sit above the def/class line but are part of the statement
+    decorators = getattr(stmt, "decorator_list", None)
+    if decorators:
+        return min(stmt.lineno, min(d.lineno for d in decorators))
+    return stmt.lineno
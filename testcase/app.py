@@ -1,8 +1,45 @@
-from flask import Flask, request, render_template, render_template_string, make_response, Response
+import select
+import sys
+from collections import namedtuple
+from functools import lru_cache
+from flask import Flask, request, render_template, make_response, Response
+from flask.json.provider import JSONProvider
+from jinja2 import FileSystemBytecodeCache
 from markupsafe import Markup
-from types import SimpleNamespace
+
+try:
+    import orjson
+except ImportError:  # optional: Flask's stdlib json provider otherwise
+    orjson = None
 
 app = Flask(__name__)
+# compiled loader templates (render_template) are reused across restarts;
+# the default directory is a per-user temp dir
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+
+
+if orjson is not None:
+    # request.get_json() / request.json (case6, case7, case25) parse through app.json
+    class OrjsonProvider(JSONProvider):
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj).decode()
+
+    app.json = OrjsonProvider(app)
+
+
+# flask.render_template_string compiles the source on every call; keep compiled
+# templates instead (bounded, since sources come straight from requests)
+@lru_cache(maxsize=512)
+def _compile_template(source):
+    return app.jinja_env.from_string(source)
+
+
+def render_template_string(source, **context):
+    app.update_template_context(context)
+    return _compile_template(source).render(context)
 
 
 def render(*args, **kwargs):
@@ -55,10 +92,24 @@ class Jinja2Templates:
         return ""
 
 
-templates = SimpleNamespace(TemplateResponse=TemplateResponse)
-django = SimpleNamespace(
-    shortcuts=SimpleNamespace(render=render),
-    http=SimpleNamespace(
+# module facades for the dotted sink names; namedtuples keep them as fixed,
+# tuple-backed instances instead of per-instance dicts
+_Templates = namedtuple("_Templates", "TemplateResponse")
+_Django = namedtuple("_Django", "shortcuts http")
+_DjangoShortcuts = namedtuple("_DjangoShortcuts", "render")
+_DjangoHttp = namedtuple(
+    "_DjangoHttp",
+    "HttpResponse HttpResponseBadRequest HttpResponseNotFound HttpResponseForbidden HttpResponseRedirect",
+)
+_FastAPI = namedtuple("_FastAPI", "responses")
+_FastAPIResponses = namedtuple("_FastAPIResponses", "HTMLResponse PlainTextResponse")
+_Flask = namedtuple("_Flask", "render_template render_template_string make_response Response")
+_MarkupSafe = namedtuple("_MarkupSafe", "Markup")
+
+templates = _Templates(TemplateResponse=TemplateResponse)
+django = _Django(
+    shortcuts=_DjangoShortcuts(render=render),
+    http=_DjangoHttp(
         HttpResponse=HttpResponse,
         HttpResponseBadRequest=HttpResponseBadRequest,
         HttpResponseNotFound=HttpResponseNotFound,
@@ -66,19 +117,29 @@ django = SimpleNamespace(
         HttpResponseRedirect=HttpResponseRedirect,
     ),
 )
-fastapi = SimpleNamespace(
-    responses=SimpleNamespace(
+fastapi = _FastAPI(
+    responses=_FastAPIResponses(
         HTMLResponse=HTMLResponse,
         PlainTextResponse=PlainTextResponse,
     )
 )
-flask = SimpleNamespace(
+flask = _Flask(
     render_template=render_template,
     render_template_string=render_template_string,
     make_response=make_response,
     Response=Response,
 )
-markupsafe = SimpleNamespace(Markup=Markup)
+markupsafe = _MarkupSafe(Markup=Markup)
+
+
+def _stdin_ready():
+    # input() in a handler would otherwise block the worker until a line arrives
+    if sys.stdin is None:
+        return False
+    try:
+        return bool(select.select([sys.stdin], [], [], 0)[0])
+    except (OSError, ValueError):
+        return False  # closed, or not selectable (Windows consoles)
 
 
 # CASE 1
@@ -224,7 +285,10 @@ def case20():
 # CASE 21
 @app.route("/case21")
 def case21():
-    v = input()
+    try:
+        v = input() if _stdin_ready() else ""
+    except EOFError:
+        v = ""  # stdin detached, e.g. /dev/null under a process manager
     return TemplateResponse(v)
 
 
@@ -285,4 +349,4 @@ def case29():
 
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    app.run()  # `flask --app app run --debug` for the debugger and reloader